@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel 拆分工具共用的小工具函数
+（excel_split_to_sheets / split_by_person / sheets_split_to_excel 共享，
+避免同一套 helper 在各脚本里重复定义、重复维护）
+"""
+import re
+from copy import copy
+from typing import List, Optional
+
+from openpyxl.cell import WriteOnlyCell
+
+DEFAULT_NAME_KEYS = ["销售员", "姓名", "员工", "人员", "负责人", "Name", "name"]
+_NAME_KEYS_SET = frozenset(DEFAULT_NAME_KEYS)
+
+# Windows 文件名非法字符替换表（模块级 str.translate 表，替代每次调用的 re.sub）
+_FILE_BAD = str.maketrans({c: "_" for c in '\\/:*?"<>|'})
+
+# “ 汇总”后缀匹配：模块级预编译，base_name 每行都要调用
+_TRAILING_SUMMARY_RE = re.compile(r"\s*汇总$")
+
+
+def detect_sheet(wb, sheet):
+    if sheet is None:
+        return wb.worksheets[0]
+    if isinstance(sheet, str):
+        if sheet.isdigit():
+            idx = int(sheet)
+            return wb.worksheets[idx]
+        if sheet in wb.sheetnames:
+            return wb[sheet]
+    if isinstance(sheet, int):
+        return wb.worksheets[sheet]
+    return wb.worksheets[0]
+
+
+def detect_name_col(header_cells: List[str], manual: Optional[str] = None) -> str:
+    if manual and manual in header_cells:
+        return manual
+    # 集合求交一次代替 关键词×表头 的多重线性扫描；按关键词优先级取命中
+    hit = set(header_cells) & _NAME_KEYS_SET
+    if hit:
+        return next(k for k in DEFAULT_NAME_KEYS if k in hit)
+    for c in header_cells:
+        if any(key in c for key in DEFAULT_NAME_KEYS):
+            return c
+    return header_cells[0]
+
+
+def base_name(s) -> str:
+    if s is None:
+        return ""
+    s = str(s).strip()
+    s = _TRAILING_SUMMARY_RE.sub("", s)  # 去掉“ 汇总”后缀
+    return s.strip()
+
+
+def sanitize_filename(name: str) -> str:
+    """清理文件名中的非法字符"""
+    return str(name).translate(_FILE_BAD)
+
+
+def _force_text(dc):
+    """openpyxl 的 value setter 会把 "=" 开头的字符串推断成活公式（无缓存值，
+    data_only 读回是空）。拆分只复制字面值，这里强制按文本落盘。"""
+    if isinstance(dc.value, str) and dc.value.startswith("="):
+        dc.data_type = "s"
+
+
+def snapshot_header_and_dimensions(src_ws, header_row=1):
+    """把表头样式/列宽/行高/冻结窗格从源工作表快照成轻量元组，只读一次。"""
+    col_dims = [(k, d.width, d.hidden, d.bestFit)
+                for k, d in src_ws.column_dimensions.items()]
+    try:
+        header_height = src_ws.row_dimensions[header_row].height
+    except Exception:
+        header_height = None
+    header_cells = []
+    for col in range(1, src_ws.max_column + 1):
+        sc = src_ws.cell(row=header_row, column=col)
+        if sc.has_style:
+            st = (copy(sc.font), copy(sc.border), copy(sc.fill),
+                  sc.number_format, copy(sc.protection), copy(sc.alignment))
+        else:
+            st = None
+        header_cells.append((sc.value, st))
+    return col_dims, header_cells, header_height, src_ws.freeze_panes
+
+
+def replay_header_and_dimensions(dst_ws, col_dims, header_cells, header_height, freeze_panes):
+    """从快照回放列宽/行高/冻结窗格（write_only 下需在首次 append 前），并写入表头行。"""
+    for col_letter, width, hidden, best_fit in col_dims:
+        nd = dst_ws.column_dimensions[col_letter]
+        nd.width = width
+        nd.hidden = hidden
+        nd.bestFit = best_fit
+    if header_height is not None:
+        try:
+            dst_ws.row_dimensions[1].height = header_height
+        except Exception:
+            pass
+    dst_ws.freeze_panes = freeze_panes
+    cells = []
+    for value, st in header_cells:
+        dc = WriteOnlyCell(dst_ws, value=value)
+        _force_text(dc)
+        if st is not None:
+            dc.font, dc.border, dc.fill = st[0], st[1], st[2]
+            dc.number_format = st[3]
+            dc.protection, dc.alignment = st[4], st[5]
+        cells.append(dc)
+    dst_ws.append(cells)
+
+
+def snapshot_column_styles(src_ws, row=2):
+    """数据行样式按列快照：取指定行各列样式，每列只 copy() 一次，
+    之后所有行按引用复用同一组样式对象（openpyxl 样式不可变，可安全共享）。
+    该行不存在时返回 None。"""
+    if src_ws.max_row < row:
+        return None
+    col_styles = []
+    for c in range(1, src_ws.max_column + 1):
+        sc = src_ws.cell(row=row, column=c)
+        if sc.has_style:
+            col_styles.append((copy(sc.font), copy(sc.border), copy(sc.fill),
+                               sc.number_format, copy(sc.protection), copy(sc.alignment)))
+        else:
+            col_styles.append(None)
+    return col_styles
+
+
+def append_styled_row(dst_ws, row_vals, col_styles):
+    """往 write_only 工作表追加一行，按列样式快照着色。
+    "=" 开头的文本格强制按文本写出（见 _force_text），不让其变成公式。"""
+    if col_styles is None:
+        if any(isinstance(v, str) and v.startswith("=") for v in row_vals):
+            cells = []
+            for v in row_vals:
+                if isinstance(v, str) and v.startswith("="):
+                    dc = WriteOnlyCell(dst_ws, value=v)
+                    _force_text(dc)
+                    cells.append(dc)
+                else:
+                    cells.append(v)
+            dst_ws.append(cells)
+        else:
+            dst_ws.append(row_vals)
+        return
+    cells = []
+    for v, st in zip(row_vals, col_styles):
+        dc = WriteOnlyCell(dst_ws, value=v)
+        _force_text(dc)
+        if st is not None:
+            dc.font, dc.border, dc.fill = st[0], st[1], st[2]
+            dc.number_format = st[3]
+            dc.protection, dc.alignment = st[4], st[5]
+        cells.append(dc)
+    dst_ws.append(cells)
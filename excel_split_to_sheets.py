@@ -6,20 +6,35 @@
 """
 import argparse
 import os
-import re
 import sys
 import tempfile
 import traceback
 import datetime as _dt
+import multiprocessing
 from collections import OrderedDict
-from copy import copy
-from typing import Optional, List, Dict
+from typing import Optional, Dict
 
 from openpyxl import load_workbook, Workbook
 from openpyxl.utils import get_column_letter
 from tqdm import tqdm
 
-DEFAULT_NAME_KEYS = ["销售员", "姓名", "员工", "人员", "负责人", "Name", "name"]
+# 可选加速：python-calamine（Rust 解析器）读取值比 openpyxl 快一个数量级；
+# 未安装时退回 openpyxl read_only 流式读取
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# 可选加速：xlsxwriter 的 constant_memory 模式逐行直写 XML（--fast 模式用，
+# 不复制源样式）；未安装时 --fast 自动回退常规模式
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from _excel_common import (append_styled_row, base_name, detect_name_col,
+                           detect_sheet, replay_header_and_dimensions,
+                           snapshot_column_styles, snapshot_header_and_dimensions)
 
 # ---------- 小工具 ----------
 def exe_dir() -> str:
@@ -84,39 +99,14 @@ def find_default_excel() -> Optional[str]:
             return os.path.join(folder, name)
     return None
 
-def detect_sheet(wb, sheet):
-    if sheet is None:
-        return wb.worksheets[0]
-    if isinstance(sheet, str):
-        if sheet.isdigit():
-            idx = int(sheet)
-            return wb.worksheets[idx]
-        if sheet in wb.sheetnames:
-            return wb[sheet]
-    if isinstance(sheet, int):
-        return wb.worksheets[sheet]
-    return wb.worksheets[0]
-
-def detect_name_col(header_cells: List[str], manual: Optional[str] = None) -> str:
-    if manual and manual in header_cells:
-        return manual
-    for key in DEFAULT_NAME_KEYS:
-        if key in header_cells:
-            return key
-    for c in header_cells:
-        if any(key in c for key in DEFAULT_NAME_KEYS):
-            return c
-    return header_cells[0]
-
-def base_name(s) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip()
-    s = re.sub(r"\s*汇总$", "", s)
-    return s.strip()
+# 进度条按批刷新：pbar.update(1) 每行一次函数调用+锁，50 万行时开销可观
+_PBAR_BATCH = 1000
+
+# Sheet 名非法字符替换表（str.translate 单遍 C 扫描，省掉每次 re.sub）
+_SHEET_BAD = str.maketrans({c: "_" for c in ':\\/*?[]'})
 
 def make_sheet_title(person: str, existing: set) -> str:
-    title = re.sub(r'[:\\/*?\[\]]', "_", (person or "未命名").strip() or "未命名")
+    title = ((person or "未命名").strip() or "未命名").translate(_SHEET_BAD)
     if len(title) > 31:
         title = title[:31]
     base = title
@@ -128,50 +118,27 @@ def make_sheet_title(person: str, existing: set) -> str:
         i += 1
     return title
 
-# ---------- 样式复制 ----------
-def copy_cell(src, dst):
-    dst.value = src.value
-    if src.has_style:
-        dst.font = copy(src.font)
-        dst.border = copy(src.border)
-        dst.fill = copy(src.fill)
-        dst.number_format = src.number_format
-        dst.protection = copy(src.protection)
-        dst.alignment = copy(src.alignment)
-
-def copy_header_and_dimensions(src_ws, dst_ws, header_row=1):
-    for col_letter, dim in src_ws.column_dimensions.items():
-        nd = dst_ws.column_dimensions[col_letter]
-        nd.width = dim.width
-        nd.hidden = dim.hidden
-        nd.bestFit = dim.bestFit
-    for col in range(1, src_ws.max_column + 1):
-        sc = src_ws.cell(row=header_row, column=col)
-        dc = dst_ws.cell(row=1, column=col)
-        copy_cell(sc, dc)
-    try:
-        dst_ws.row_dimensions[1].height = src_ws.row_dimensions[header_row].height
-    except Exception:
-        pass
-    dst_ws.freeze_panes = src_ws.freeze_panes
-
-def write_row_from_src(src_ws, dst_ws, src_row_idx, dst_row_idx):
-    for col in range(1, src_ws.max_column + 1):
-        sc = src_ws.cell(row=src_row_idx, column=col)
-        dc = dst_ws.cell(row=dst_row_idx, column=col)
-        copy_cell(sc, dc)
+# ---------- 原子化保存 ----------
+try:
+    from atomicwrites import atomic_write
+except ImportError:
+    atomic_write = None
 
-# ---------- 原子化保存 + 自检 ----------
 def safe_save_xlsx(workbook: Workbook, out_path: str):
-    from openpyxl import load_workbook as _load
+    # openpyxl 的 save() 要么完整成功要么抛异常，失败时不会走到原子替换，
+    # 因此无需再回读一遍刚写出的文件自检（省掉一次完整 XML 解析）。
     folder = os.path.dirname(os.path.abspath(out_path)) or "."
     os.makedirs(folder, exist_ok=True)
+    if atomic_write is not None:
+        # 临时文件 + fsync + os.replace，跨平台原子替换
+        with atomic_write(out_path, mode="wb", overwrite=True) as f:
+            workbook.save(f)
+        return
+    # 退路：环境里没有 atomicwrites 时仍用临时文件 + 原子替换
     fd, tmp = tempfile.mkstemp(prefix="._tmp_xlsx_", suffix=".xlsx", dir=folder)
     os.close(fd)
     try:
         workbook.save(tmp)
-        _wb = _load(tmp, read_only=True, data_only=True)  # 自检
-        _wb.close()
         os.replace(tmp, out_path)  # 原子替换
     finally:
         if os.path.exists(tmp):
@@ -182,11 +149,12 @@ def safe_save_xlsx(workbook: Workbook, out_path: str):
 def split_to_sheets(in_path: str, sheet_sel, name_col_manual: Optional[str],
                     out_file: str, keep_empty: bool, show_progress: bool):
     log(f"输入文件：{in_path}")
-    src_wb = load_workbook(in_path, data_only=True)
-    src_ws = detect_sheet(src_wb, sheet_sel)
-    log(f"工作表：{src_ws.title}")
+    # 第一遍：普通模式只读表头样式/列宽/冻结窗格等元信息
+    style_wb = load_workbook(in_path, data_only=True)
+    style_ws = detect_sheet(style_wb, sheet_sel)
+    log(f"工作表：{style_ws.title}")
 
-    header = [str(c.value).strip() if c.value is not None else "" for c in next(src_ws.iter_rows(min_row=1, max_row=1))]
+    header = [str(c.value).strip() if c.value is not None else "" for c in next(style_ws.iter_rows(min_row=1, max_row=1))]
     if not header or all(not h for h in header):
         raise RuntimeError("无法读取表头（第 1 行为空）。")
 
@@ -197,44 +165,148 @@ def split_to_sheets(in_path: str, sheet_sel, name_col_manual: Optional[str],
         raise RuntimeError(f"未找到姓名列：{name_col}")
     log(f"使用姓名列：{name_col}（第 {name_col_idx} 列）")
 
-    out_wb = Workbook()
-    default_ws = out_wb.active
-    out_wb.remove(default_ws)
+    # 数据行样式按列缓存：取源第 2 行各列的样式，每列只 copy() 一次，
+    # 后续所有行按引用复用同一组样式对象（openpyxl 样式不可变，可安全共享）
+    col_styles = snapshot_column_styles(style_ws, row=2)
 
-    books: Dict[str, object] = OrderedDict()
-    existing_titles = set()
     header_row_idx = 1
 
-    total_rows = max(src_ws.max_row - 1, 0)
-    pbar = tqdm(total=total_rows, desc="写入各人员Sheet", unit="行", disable=not show_progress)
+    # 表头样式/列宽/冻结窗格只快照一次，各人员 Sheet 直接回放；
+    # 快照完成后样式工作簿即可释放
+    header_snapshot = snapshot_header_and_dimensions(style_ws, header_row=header_row_idx)
+    sheet_title = style_ws.title
+    style_wb.close()
 
-    for r in range(2, src_ws.max_row + 1):
-        person_raw = src_ws.cell(row=r, column=name_col_idx).value
-        person = base_name(person_raw)
-        if not person and not keep_empty:
-            pbar.update(1); continue
+    # write_only：各 Sheet 的行直接流式写入 ZIP，不在内存保留 Cell 树
+    out_wb = Workbook(write_only=True)
 
-        if person not in books:
-            title = make_sheet_title(person, existing_titles)
-            existing_titles.add(title)
-            dst_ws = out_wb.create_sheet(title=title)
-            copy_header_and_dimensions(src_ws, dst_ws, header_row=header_row_idx)
-            books[person] = dst_ws
+    existing_titles = set()
 
-        dst_ws = books[person]
-        dst_next_row = dst_ws.max_row + 1
-        write_row_from_src(src_ws, dst_ws, r, dst_next_row)
-        pbar.update(1)
+    # 第二遍：流式读取数据行。优先用 calamine（Rust 解析器），
+    # 否则退回 openpyxl read_only（SAX 解析，逐行产出元组）
+    src_wb = None
+    if CalamineWorkbook is not None:
+        all_rows = CalamineWorkbook.from_path(in_path) \
+            .get_sheet_by_name(sheet_title).to_python(skip_empty_area=False)
+        # calamine 的空单元格是 ""，统一成 None 与 openpyxl 行为一致
+        data_rows = [[None if v == "" else v for v in row] for row in all_rows[1:]]
+        total_rows = len(data_rows)
+    else:
+        src_wb = load_workbook(in_path, read_only=True, data_only=True)
+        src_ws = detect_sheet(src_wb, sheet_sel)
+        data_rows = src_ws.iter_rows(min_row=2, values_only=True)
+        total_rows = max(src_ws.max_row - 1, 0)
 
+    pbar = tqdm(total=total_rows, desc="写入各人员Sheet", unit="行", disable=not show_progress)
+
+    # 先分组后批量写：一次扫描把每个人的行按出现顺序收集到一起，
+    # 再逐人连续写入，避免在多个目标 Sheet 间来回切换
+    groups: Dict[str, list] = OrderedDict()
+    pending = 0
+    for row_vals in data_rows:
+        person_raw = row_vals[name_col_idx - 1] if len(row_vals) >= name_col_idx else None
+        person = base_name(person_raw)
+        if person or keep_empty:
+            groups.setdefault(person, []).append(row_vals)
+        pending += 1
+        if pending >= _PBAR_BATCH:
+            pbar.update(pending); pending = 0
+
+    if pending:
+        pbar.update(pending)
     pbar.close()
+    if src_wb is not None:
+        src_wb.close()
 
-    for person, ws in books.items():
-        last_col_letter = get_column_letter(ws.max_column)
-        ws.auto_filter.ref = f"A1:{last_col_letter}{ws.max_row}"
+    last_col_letter = get_column_letter(len(header))
+    books: Dict[str, object] = OrderedDict()
+    for person, rows in groups.items():
+        title = make_sheet_title(person, existing_titles)
+        existing_titles.add(title)
+        dst_ws = out_wb.create_sheet(title=title)
+        replay_header_and_dimensions(dst_ws, *header_snapshot)
+        books[person] = dst_ws
+
+        for row_vals in rows:
+            append_styled_row(dst_ws, row_vals, col_styles)
+
+        dst_ws.auto_filter.ref = f"A1:{last_col_letter}{len(rows) + 1}"
 
     safe_save_xlsx(out_wb, out_file)
     log(f"完成！共写入 {len(books)} 个人员Sheet -> {out_file}")
 
+def split_to_sheets_fast(in_path: str, sheet_sel, name_col_manual: Optional[str],
+                         out_file: str, keep_empty: bool, show_progress: bool):
+    """--fast 模式：用 xlsxwriter 的 constant_memory 逐行直写工作表 XML，
+    绕开 openpyxl 的 Cell/样式对象层。代价：数据行不保留源样式（仅表头加粗），
+    适合只关心数据本身的大表拆分。"""
+    log(f"输入文件：{in_path}（fast 模式：不保留源样式）")
+    src_wb = load_workbook(in_path, read_only=True, data_only=True)
+    src_ws = detect_sheet(src_wb, sheet_sel)
+    log(f"工作表：{src_ws.title}")
+
+    rows_iter = src_ws.iter_rows(values_only=True)
+    first = next(rows_iter, None)
+    header = [str(v).strip() if v is not None else "" for v in (first or ())]
+    if not header or all(not h for h in header):
+        raise RuntimeError("无法读取表头（第 1 行为空）。")
+
+    name_col = detect_name_col(header, name_col_manual)
+    try:
+        name_col_idx = header.index(name_col) + 1
+    except ValueError:
+        raise RuntimeError(f"未找到姓名列：{name_col}")
+    log(f"使用姓名列：{name_col}（第 {name_col_idx} 列）")
+
+    total_rows = max(src_ws.max_row - 1, 0)
+    pbar = tqdm(total=total_rows, desc="写入各人员Sheet", unit="行", disable=not show_progress)
+
+    groups: Dict[str, list] = OrderedDict()
+    pending = 0
+    for row_vals in rows_iter:
+        person_raw = row_vals[name_col_idx - 1] if len(row_vals) >= name_col_idx else None
+        person = base_name(person_raw)
+        if person or keep_empty:
+            groups.setdefault(person, []).append(row_vals)
+        pending += 1
+        if pending >= _PBAR_BATCH:
+            pbar.update(pending); pending = 0
+
+    if pending:
+        pbar.update(pending)
+    pbar.close()
+    src_wb.close()
+
+    folder = os.path.dirname(os.path.abspath(out_file)) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="._tmp_xlsx_", suffix=".xlsx", dir=folder)
+    os.close(fd)
+    try:
+        # constant_memory：写完一行立即刷到临时文件，内存里只保留当前行
+        out_wb = xlsxwriter.Workbook(tmp, {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd",
+        })
+        header_fmt = out_wb.add_format({"bold": True})
+        existing_titles = set()
+        n_cols = len(header)
+        for person, rows in groups.items():
+            title = make_sheet_title(person, existing_titles)
+            existing_titles.add(title)
+            ws = out_wb.add_worksheet(title)
+            ws.write_row(0, 0, header, header_fmt)
+            ws.freeze_panes(1, 0)
+            ws.autofilter(0, 0, len(rows), n_cols - 1)
+            for r, row_vals in enumerate(rows, start=1):
+                ws.write_row(r, 0, row_vals)
+        out_wb.close()
+        os.replace(tmp, out_file)  # 原子替换
+    finally:
+        if os.path.exists(tmp):
+            try: os.remove(tmp)
+            except: pass
+    log(f"完成！共写入 {len(groups)} 个人员Sheet -> {out_file}")
+
 def main():
     ap = argparse.ArgumentParser(description="按人名把汇总表拆成一个Excel（多Sheet，保留样式，原子化保存）")
     ap.add_argument("-i", "--input", help="输入 Excel 路径（默认自动扫描或弹框选择）")
@@ -242,6 +314,8 @@ def main():
     ap.add_argument("-c", "--name-col", help="姓名列名（默认自动识别）")
     ap.add_argument("-o", "--out-file", help="输出Excel路径（默认：按人分Sheet_时间戳.xlsx）")
     ap.add_argument("--keep-empty", action="store_true", help="保留姓名为空的行（默认不保留）")
+    ap.add_argument("--fast", action="store_true",
+                    help="用 xlsxwriter constant_memory 直写（最快最省内存，但不保留源样式）")
     args = ap.parse_args()
 
     try:
@@ -261,7 +335,12 @@ def main():
         # 有控制台才显示进度条
         show_progress = sys.stdout.isatty()
 
-        split_to_sheets(in_path, args.sheet, args.name_col, out_file, args.keep_empty, show_progress)
+        if args.fast and xlsxwriter is not None:
+            split_to_sheets_fast(in_path, args.sheet, args.name_col, out_file, args.keep_empty, show_progress)
+        else:
+            if args.fast:
+                log("未安装 xlsxwriter，--fast 回退为常规模式")
+            split_to_sheets(in_path, args.sheet, args.name_col, out_file, args.keep_empty, show_progress)
 
     except Exception as e:
         tb = traceback.format_exc()
@@ -269,4 +348,7 @@ def main():
         show_error("运行失败", f"{e}\n\n详细日志见：{log_file_path()}")
 
 if __name__ == "__main__":
+    # pyinstaller 冻结后 Windows spawn 的子进程会重新执行入口脚本，
+    # 冻结分发的入口统一调 freeze_support 保护
+    multiprocessing.freeze_support()
     main()
@@ -26,25 +26,39 @@ if getattr(sys, 'frozen', False):
     os.chdir(pathlib.Path(sys.executable).parent)
 
 from pathlib import Path
+import argparse
+import io
+import shutil
 import re, unicodedata, collections
-import pandas as pd
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from openpyxl import load_workbook
 from openpyxl.styles import PatternFill
 from tqdm import tqdm
 from pypdf import PdfReader, PdfWriter
 
+# 可选加速：pikepdf（libqpdf 绑定）合并页面为引用操作、保存即流式，
+# 大批量票据下内存和耗时都明显低于 pypdf；未安装时退回 pypdf
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
 ROOT = Path.cwd()  # 当前运行目录
 
 # ---------- 通用处理 ----------
+# 常见括号/标点一次性删除表（str.translate 为 C 级单遍扫描，替代逐次 re.sub）
+_DROP = str.maketrans("", "", "()（）【】[]「」『』“”\"'、，．·•-—")
+
+@lru_cache(maxsize=4096)
 def norm(txt: str | None) -> str:
     if txt is None:
         return ""
-    # 全角→半角，去空格
+    # 全角→半角；随后删标点、去空格
     txt = unicodedata.normalize("NFKC", str(txt))
-    txt = re.sub(r"\s+", "", txt)
-    # 删除常见括号/标点
-    txt = re.sub(r"[()（）【】\[\]「」『』“”\"'、，．·•\-—]", "", txt)
-    return txt.upper()
+    txt = txt.translate(_DROP)
+    return "".join(txt.split()).upper()
 
 def company_from_subject(subject: str) -> str:
     """Excel 科目名称 >>> 公司名"""
@@ -60,6 +74,15 @@ def company_from_filename(stem: str) -> str:
             return norm(p)
     return norm(stem)
 
+# PdfReader 缓存：同一 PDF 在主合并与“未匹配”合并中只解析一次 xref
+_reader_cache: dict[Path, PdfReader] = {}
+
+def get_reader(p: Path) -> PdfReader:
+    rd = _reader_cache.get(p)
+    if rd is None:
+        rd = _reader_cache[p] = PdfReader(p)
+    return rd
+
 def is_pdf_file(p: Path) -> bool:
     if p.suffix.lower() == ".pdf":
         return True
@@ -69,12 +92,83 @@ def is_pdf_file(p: Path) -> bool:
     except Exception:
         return False
 
+def _merge_company(paths: list[Path]) -> bytes:
+    """子进程任务：合并一家公司的全部 PDF，返回合并后的字节流。"""
+    buf = io.BytesIO()
+    if pikepdf is not None:
+        srcs = []
+        with pikepdf.Pdf.new() as out:
+            for p in paths:
+                src = pikepdf.Pdf.open(p)
+                srcs.append(src)  # 源需保持打开到 save 完成
+                out.pages.extend(src.pages)
+            out.save(buf)
+        for src in srcs:
+            src.close()
+    else:
+        w = PdfWriter()
+        for p in paths:
+            w.append_pages_from_reader(PdfReader(p))
+        w.write(buf)
+    return buf.getvalue()
+
+def write_merged_pdf(out_path: Path, parts: list[bytes]) -> int:
+    """把若干段 PDF 字节流按序拼接写盘，返回总页数。"""
+    if not parts:
+        return 0
+    if pikepdf is not None:
+        srcs = []
+        with pikepdf.Pdf.new() as out:
+            for part in parts:
+                src = pikepdf.Pdf.open(io.BytesIO(part))
+                srcs.append(src)
+                out.pages.extend(src.pages)
+            n_pages = len(out.pages)
+            out.save(out_path)
+        for src in srcs:
+            src.close()
+        return n_pages
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(io.BytesIO(part))
+    with out_path.open("wb") as f:
+        writer.write(f)
+    return len(writer.pages)
+
+def merge_pdf_files(out_path: Path, paths: list[Path]) -> int:
+    """按序合并磁盘上的 PDF 文件，返回总页数。"""
+    if not paths:
+        return 0
+    if pikepdf is not None:
+        srcs = []
+        with pikepdf.Pdf.new() as out:
+            for p in paths:
+                src = pikepdf.Pdf.open(p)
+                srcs.append(src)
+                out.pages.extend(src.pages)
+            n_pages = len(out.pages)
+            out.save(out_path)
+        for src in srcs:
+            src.close()
+        return n_pages
+    writer = PdfWriter()
+    for p in paths:
+        writer.append_pages_from_reader(get_reader(p))
+    with out_path.open("wb") as f:
+        writer.write(f)
+    return len(writer.pages)
+
 # ---------- 扫描全部 PDF ----------
-def build_pdf_map(root: Path) -> dict[str, list[Path]]:
+def build_pdf_map(root: Path, deep_scan: bool = False) -> dict[str, list[Path]]:
     pdf_map: dict[str, list[Path]] = {}
-    for f in root.rglob("*"):
-        if f.is_file() and is_pdf_file(f):
-            pdf_map.setdefault(company_from_filename(f.stem), []).append(f)
+    if deep_scan:
+        # 深度扫描：遍历所有文件并读魔数识别（处理扩展名丢失的票据）
+        files = (f for f in root.rglob("*") if f.is_file() and is_pdf_file(f))
+    else:
+        # 默认按扩展名过滤，避免对树中每个非 PDF 文件各做一次 open/read
+        files = (f for f in root.rglob("*.[pP][dD][fF]") if f.is_file())
+    for f in files:
+        pdf_map.setdefault(company_from_filename(f.stem), []).append(f)
     print(f"[INFO] 扫描到 PDF 总数: {sum(len(v) for v in pdf_map.values())}")
     return pdf_map
 
@@ -86,46 +180,69 @@ def process_excel(excel_path: Path, pdf_map: dict[str, list[Path]]):
     out_txt   = ROOT / f"{prefix}-未匹配PDF清单.txt"
 
     print(f"\n=== 处理 {excel_path.name} ===")
-    df = pd.read_excel(excel_path)
-    if "科目名称" not in df.columns:
+    # 流式只读：仅取“科目名称”一列，避免 pandas 全表加载 + 二次解析
+    wb_ro = load_workbook(excel_path, read_only=True, data_only=True)
+    ws_ro = wb_ro.active
+    header = next(ws_ro.iter_rows(min_row=1, max_row=1, values_only=True), None)
+    if not header or "科目名称" not in header:
+        wb_ro.close()
         print("❌ 缺少『科目名称』列，跳过")
-        return
+        return {}
+    subj_idx = header.index("科目名称")
+    # 短行（dimension 记录缺失/错误时 read_only 可能吐出）也要占位：
+    # 丢行会让后面 missing_rows 的 idx+2 行号整体错位
+    subjects = ["" if len(row) <= subj_idx or row[subj_idx] is None
+                else str(row[subj_idx])
+                for row in ws_ro.iter_rows(min_row=2, values_only=True)]
+    wb_ro.close()
 
     # 统计重复
-    counter = collections.Counter(company_from_subject(c) for c in df["科目名称"])
+    counter = collections.Counter(company_from_subject(c) for c in subjects)
     dup_excel = {k: v for k, v in counter.items() if v > 1}
     if dup_excel:
         print("[INFO] Excel 重复公司:", ", ".join(f"{k}×{v}" for k, v in dup_excel.items()))
 
-    writer = PdfWriter()
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    red = PatternFill("solid", fgColor="FFFF0000")
     seen, missing_rows, used = set(), [], set()
 
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="合并 PDF"):
-        comp = company_from_subject(row["科目名称"])
+    # 先按行序分类：有票的公司进合并队列，缺票的记下行号待标红
+    merge_jobs: list[list[Path]] = []
+    for idx, subject in enumerate(subjects):
+        comp = company_from_subject(subject)
         if comp in seen:
             continue
         seen.add(comp)
         bucket = pdf_map.get(comp, [])
         if bucket:
             used.add(comp)
-            for pdf in bucket:
-                for pg in PdfReader(pdf).pages:
-                    writer.add_page(pg)
+            merge_jobs.append(bucket)
         else:
-            r = idx + 2
-            missing_rows.append(r)
-            for cell in ws[r]:
-                cell.fill = red
+            missing_rows.append(idx + 2)
+
+    # 每家公司的 PDF 解析互相独立，用进程池并行解析，主进程按行序拼接
+    merged_parts: list[bytes] = []
+    if merge_jobs:
+        workers = min(os.cpu_count() or 1, len(merge_jobs))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futs = [ex.submit(_merge_company, bucket) for bucket in merge_jobs]
+            for fut in tqdm(futs, desc="合并 PDF"):
+                merged_parts.append(fut.result())
 
     # 主合并 PDF
-    if writer.pages:
-        with out_pdf.open("wb") as f:
-            writer.write(f)
-        print(f"[OK] 输出合并 PDF: {out_pdf.name} ({len(writer.pages)} 页)")
-    wb.save(out_excel)
+    n_pages = write_merged_pdf(out_pdf, merged_parts)
+    if n_pages:
+        print(f"[OK] 输出合并 PDF: {out_pdf.name} ({n_pages} 页)")
+
+    # 只有确有缺票时才全量加载工作簿做标红；否则直接复制，省一次完整解析+序列化
+    if missing_rows:
+        wb = load_workbook(excel_path)
+        ws = wb.active
+        red = PatternFill("solid", fgColor="FFFF0000")
+        for r in missing_rows:
+            for cell in ws[r]:
+                cell.fill = red
+        wb.save(out_excel)
+    else:
+        shutil.copy(excel_path, out_excel)
     print(f"[OK] 输出标红 Excel: {out_excel.name}")
 
     # 未匹配统计
@@ -148,7 +265,15 @@ def process_excel(excel_path: Path, pdf_map: dict[str, list[Path]]):
 
 # ---------- 主入口 ----------
 if __name__ == "__main__":
-    pdf_map_full = build_pdf_map(ROOT)
+    # pyinstaller 冻结后 Windows spawn 的子进程会重新执行入口脚本，
+    # 不调 freeze_support 会把整个合并流程在每个池工作进程里再跑一遍
+    multiprocessing.freeze_support()
+    ap = argparse.ArgumentParser(description="按 Excel 科目顺序合并发票 PDF")
+    ap.add_argument("--deep-scan", action="store_true",
+                    help="按文件魔数识别 PDF（扫描所有文件，较慢；处理扩展名异常的票据）")
+    args = ap.parse_args()
+
+    pdf_map_full = build_pdf_map(ROOT, deep_scan=args.deep_scan)
     excel_paths = list(ROOT.glob("*.xls*"))
     if not excel_paths:
         print("⚠️ 当前目录未找到任何 Excel")
@@ -165,13 +290,9 @@ if __name__ == "__main__":
     # 合并所有未匹配 PDF
     if unmatched_global:
         out_unmatched_pdf = ROOT / "未使用到的PDF合并后文件.pdf"
-        writer_u = PdfWriter()
-        for comp, files in sorted(unmatched_global.items()):
-            for pdf in files:
-                for pg in PdfReader(pdf).pages:
-                    writer_u.add_page(pg)
-        with out_unmatched_pdf.open("wb") as f:
-            writer_u.write(f)
+        all_unmatched = [pdf for comp, files in sorted(unmatched_global.items())
+                         for pdf in files]
+        merge_pdf_files(out_unmatched_pdf, all_unmatched)
         print(f"\n[OK] 全部未匹配 PDF 已合并: {out_unmatched_pdf.name}")
 
     print("\n✅ 全部 Excel 处理完成")
@@ -10,18 +10,42 @@ Excel Sheet 拆分工具（值+样式版）
 """
 
 import os
+import shutil
 import sys
 import datetime as _dt
 import traceback
 import argparse
+import zipfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from copy import copy
+from xml.etree.ElementTree import fromstring, iterparse
 
+import openpyxl
 from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.page import PageMargins, PrintPageSetup
 from tqdm import tqdm
 
+# 打印设置/页边距的出厂默认值：源表等于默认时跳过 copy + 赋值
+# （Serialisable 按字段比较相等性）
+_DEFAULT_PAGE_SETUP = PrintPageSetup()
+_DEFAULT_PAGE_MARGINS = PageMargins()
+
+# 可选加速：装有 lxml 时 openpyxl 自动换用其 C 实现的读写器
+# （openpyxl.LXML 反映探测结果，读/写 XML 各快约 2 倍）；
+# 未安装时回退纯 Python 的 xml.etree，功能不变
+_HAS_LXML = bool(getattr(openpyxl, "LXML", False))
+
+from _excel_common import sanitize_filename
+
+# SpreadsheetML 命名空间
+_SSML = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
 
 def log(msg: str):
     """日志输出"""
@@ -29,66 +53,229 @@ def log(msg: str):
     print(f"[{ts}] {msg}", flush=True)
 
 
-def sanitize_filename(name: str) -> str:
-    """清理文件名中的非法字符"""
-    import re
-    # 替换Windows文件名中的非法字符
-    return re.sub(r'[\\/:*?"<>|]', "_", str(name))
 
 
-def copy_value_and_style(val_cell, style_cell, dst_cell):
+def enable_fast_compress():
+    """把 openpyxl 保存 xlsx 的 zlib 压缩级别从默认 6 降到 1（--fast-compress）。
+
+    XLSX 里的 XML 在级别 1 下压缩率只差百分之几，压缩速度却快约 3 倍，
+    保存阶段整体能省 25–40%。openpyxl 没有暴露该参数（其 save_workbook
+    写死 ZIP_DEFLATED），这里用子类替换写入模块引用的 ZipFile 注入
+    compresslevel。"""
+    import openpyxl.writer.excel as _xl_writer
+
+    class _FastZipFile(zipfile.ZipFile):
+        def __init__(self, *args, **kwargs):
+            kwargs.setdefault("compresslevel", 1)
+            super().__init__(*args, **kwargs)
+
+    _xl_writer.ZipFile = _FastZipFile
+
+
+def sheet_xml_paths(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """sheet 名 -> ZIP 内 worksheet XML 路径（workbook.xml 与 rels 各解析一次）"""
+    rid_to_target = {r.get("Id"): r.get("Target")
+                     for r in fromstring(zf.read("xl/_rels/workbook.xml.rels"))}
+    paths = {}
+    for sh in fromstring(zf.read("xl/workbook.xml")).iter(f"{_SSML}sheet"):
+        target = rid_to_target.get(sh.get(f"{_REL}id")) or ""
+        if target.startswith("/"):
+            target = target[1:]
+        elif not target.startswith("xl/"):
+            target = "xl/" + target
+        paths[sh.get("name")] = target
+    return paths
+
+
+def load_formula_cache(zf: zipfile.ZipFile, xml_path: str) -> Dict[str, object]:
     """
-    把“值”和“样式”分别从不同源单元格拷到目标单元格：
-    - 值：来自 data_only=True 的工作簿（即公式的缓存值）
-    - 样式：来自 data_only=False 的工作簿
+    单遍 iterparse 工作表 XML，只收集公式单元格的缓存值：{坐标: 值}。
+    替代整本 data_only=True 的二次 load_workbook——公式结果（t="str"/数值/
+    布尔）都直接存在 <v> 里，不经过 sharedStrings，无需完整解析器。
+    注意：日期型公式结果保留为序列数，单元格数字格式照抄后 Excel 显示不变。
     """
-    # 值（如果缓存为 None，就按 None 拷；不引入公式）
-    dst_cell.value = val_cell.value
-
-    # 样式
-    if style_cell.has_style:
-        dst_cell.font = copy(style_cell.font)
-        dst_cell.border = copy(style_cell.border)
-        dst_cell.fill = copy(style_cell.fill)
-        dst_cell.number_format = style_cell.number_format
-        dst_cell.protection = copy(style_cell.protection)
-        dst_cell.alignment = copy(style_cell.alignment)
+    cache: Dict[str, object] = {}
+    c_tag, f_tag, v_tag = f"{_SSML}c", f"{_SSML}f", f"{_SSML}v"
+    with zf.open(xml_path) as f:
+        for _, el in iterparse(f):
+            if el.tag != c_tag:
+                continue
+            if el.find(f_tag) is not None:
+                vel = el.find(v_tag)
+                coord = el.get("r")
+                if vel is None or vel.text is None:
+                    cache[coord] = None
+                else:
+                    txt = vel.text
+                    t = el.get("t")
+                    if t in ("str", "e"):
+                        cache[coord] = txt
+                    elif t == "b":
+                        cache[coord] = bool(int(txt))
+                    else:
+                        try:
+                            num = float(txt)
+                            cache[coord] = int(num) if num.is_integer() else num
+                        except ValueError:
+                            cache[coord] = txt
+            el.clear()  # 及时释放已消费的元素，保持内存 O(1)
+    return cache
+
+
+def share_style_registries(src_wb, dst_wb):
+    """
+    让目标工作簿直接复用源工作簿的样式注册表。
+    openpyxl 的样式按索引存放在工作簿级列表里（字体/边框/填充等均不可变），
+    共享注册表后，逐格样式复制只需拷贝 StyleArray（一组整数索引），
+    不必再对六个样式对象各 copy() 一次。
+    """
+    for attr in ("_fonts", "_fills", "_borders", "_alignments",
+                 "_protections", "_number_formats", "_named_styles"):
+        setattr(dst_wb, attr, getattr(src_wb, attr))
 
 
-def copy_worksheet_values_and_styles(src_ws_vals, src_ws_styles, dst_ws):
-    """复制工作表（仅值）+ 样式/布局"""
-    # 复制所有单元格（值+样式）
+def stream_worksheet_values_and_styles(formula_cache, src_ws_styles, dst_ws):
+    """copy_worksheet_values_and_styles 的流式版本：目标为 write_only 工作表，
+    每行 append 后立即序列化进 ZIP，不在内存里建目标 Cell 树（openpyxl 的
+    write_only 底层就是 xmlfile 增量写）。仅用于无合并单元格、无工作表保护
+    的 sheet——这两样 write_only 模式无法回放，带它们的表走普通路径。"""
     formula_count = 0
     missing_cached = 0
 
-    for row in src_ws_styles.iter_rows():
+    # 布局必须在首次 append 之前设置
+    for letter, dim in src_ws_styles.column_dimensions.items():
+        if dim.width is not None:
+            dst_ws.column_dimensions[letter].width = dim.width
+    for num, dim in src_ws_styles.row_dimensions.items():
+        if dim.height is not None:
+            dst_ws.row_dimensions[num].height = dim.height
+    if src_ws_styles.freeze_panes:
+        dst_ws.freeze_panes = src_ws_styles.freeze_panes
+    if src_ws_styles.auto_filter and src_ws_styles.auto_filter.ref:
+        dst_ws.auto_filter.ref = src_ws_styles.auto_filter.ref
+    try:
+        if src_ws_styles.page_setup != _DEFAULT_PAGE_SETUP:
+            dst_ws.page_setup = copy(src_ws_styles.page_setup)
+        if src_ws_styles.page_margins != _DEFAULT_PAGE_MARGINS:
+            dst_ws.page_margins = copy(src_ws_styles.page_margins)
+    except Exception:
+        pass
+
+    fcache_get = formula_cache.get
+    min_row = src_ws_styles.min_row
+    max_col = src_ws_styles.max_column
+
+    # 起始行之前的空白区用空行垫出，保持行号一致
+    for _ in range(min_row - 1):
+        dst_ws.append([])
+
+    for row in src_ws_styles.iter_rows(min_row=min_row, min_col=1,
+                                       max_row=src_ws_styles.max_row, max_col=max_col):
+        cells = []
         for style_cell in row:
-            r, c = style_cell.row, style_cell.column
-            val_cell = src_ws_vals.cell(row=r, column=c)
-            if (val_cell.value is not None) or style_cell.has_style:
-                dst_cell = dst_ws.cell(row=r, column=c)
-                copy_value_and_style(val_cell, style_cell, dst_cell)
+            val = style_cell.value
+            has_style = style_cell.has_style
+            if val is None and not has_style:
+                cells.append(None)
+                continue
+            is_formula = (
+                style_cell.data_type == "f" or
+                (isinstance(val, str) and val.startswith("="))
+            )
+            if is_formula:
+                formula_count += 1
+                val = fcache_get(style_cell.coordinate)
+                if val is None:
+                    missing_cached += 1
+            if not has_style:
+                # 无样式格直接给裸值，append 时自行包装，省一个 WriteOnlyCell
+                cells.append(val)
+                continue
+            dc = WriteOnlyCell(dst_ws, value=val)
+            # 注册表已共享，索引两边含义一致；序列化只读 StyleArray，
+            # 直接引用源对象即可，无需 copy
+            dc._style = style_cell._style
+            cells.append(dc)
+        dst_ws.append(cells)
 
-            # 统计无缓存值的公式（用于友好提示）
-            try:
-                is_formula = (
-                    getattr(style_cell, "data_type", None) == "f" or
-                    (isinstance(style_cell.value, str) and style_cell.value.startswith("="))
-                )
-                if is_formula:
-                    formula_count += 1
-                    if val_cell.value is None:
-                        missing_cached += 1
-            except Exception:
-                pass
+    return formula_count, missing_cached
+
+
+def copy_worksheet_values_and_styles(formula_cache, src_ws_styles, dst_ws):
+    """复制工作表（仅值）+ 样式/布局
 
-    # 复制列宽
-    for col_letter, dimension in src_ws_styles.column_dimensions.items():
-        dst_ws.column_dimensions[col_letter].width = dimension.width
+    非公式单元格的值直接取自样式工作簿（与字面值一致）；公式单元格用
+    formula_cache（坐标 -> 缓存值）覆盖，不再整本二次解析。样式按
+    StyleArray 索引拷贝（目标工作簿已通过 share_style_registries 共享源
+    样式注册表，索引在两边含义一致）。
+    """
+    # 复制所有单元格（值+样式）
+    formula_count = 0
+    missing_cached = 0
 
-    # 复制行高
-    for row_num, dimension in src_ws_styles.row_dimensions.items():
-        dst_ws.row_dimensions[row_num].height = dimension.height
+    # StyleArray 去重：openpyxl 解析时同一样式索引的单元格共享同一个
+    # StyleArray 对象，按 id() 记忆化后每个唯一样式整张表只 copy() 一次
+    # （典型工作簿唯一样式不过几十个，而单元格数以十万计）
+    style_cache: dict = {}
+
+    # 内层双循环每格要执行数次属性/字典查找，百万格级别时把绑定方法
+    # 提升为局部变量可以省掉重复的 LOAD_ATTR（纯 CPython 层面的热路径收紧）
+    dst_cell_at = dst_ws.cell
+    cache_get = style_cache.get
+    fcache_get = formula_cache.get
+
+    # 把迭代裁剪到真实使用区间：iter_rows() 默认从 A1 起走完整个
+    # bounding box，首行/首列之前的空白区在稀疏表上纯属浪费
+    for row in src_ws_styles.iter_rows(min_row=src_ws_styles.min_row,
+                                       min_col=src_ws_styles.min_column,
+                                       max_row=src_ws_styles.max_row,
+                                       max_col=src_ws_styles.max_column):
+        for style_cell in row:
+            val = style_cell.value
+            has_style = style_cell.has_style
+            if val is None and not has_style:
+                # bounding box 内的纯占位空格：无值无样式，直接跳过
+                continue
+            is_formula = (
+                style_cell.data_type == "f" or
+                (isinstance(val, str) and val.startswith("="))
+            )
+            if is_formula:
+                formula_count += 1
+                val = fcache_get(style_cell.coordinate)
+                if val is None:
+                    missing_cached += 1
+
+            if not has_style:
+                # 纯值单元格（多数数据格都无自定义样式）：
+                # cell(value=...) 一步构造，省一次独立的 .value 赋值调度
+                dst_cell_at(row=style_cell.row, column=style_cell.column, value=val)
+                continue
+
+            dst_cell = dst_cell_at(row=style_cell.row, column=style_cell.column)
+            # 值（公式无缓存值时按 None 拷；不引入公式）
+            dst_cell.value = val
+            sid = id(style_cell._style)
+            st = cache_get(sid)
+            if st is None:
+                st = style_cache[sid] = copy(style_cell._style)
+            dst_cell._style = st
+
+    # 复制列宽/行高：先一次性筛出有自定义尺寸的条目，
+    # 跳过 width/height 为 None 的列行，免得在目标 DimensionHolder 里
+    # 为它们各分配一个纯默认值的 Dimension 对象
+    col_pairs = [(letter, dim.width)
+                 for letter, dim in src_ws_styles.column_dimensions.items()
+                 if dim.width is not None]
+    for letter, width in col_pairs:
+        # customWidth 是按 width 推导的只读属性，设置宽度即生效
+        dst_ws.column_dimensions[letter].width = width
+
+    row_pairs = [(num, dim.height)
+                 for num, dim in src_ws_styles.row_dimensions.items()
+                 if dim.height is not None]
+    for num, height in row_pairs:
+        dst_ws.row_dimensions[num].height = height
 
     # 复制合并单元格
     for merged_range in src_ws_styles.merged_cells.ranges:
@@ -104,8 +291,10 @@ def copy_worksheet_values_and_styles(src_ws_vals, src_ws_styles, dst_ws):
 
     # 打印设置
     try:
-        dst_ws.page_setup = copy(src_ws_styles.page_setup)
-        dst_ws.page_margins = copy(src_ws_styles.page_margins)
+        if src_ws_styles.page_setup != _DEFAULT_PAGE_SETUP:
+            dst_ws.page_setup = copy(src_ws_styles.page_setup)
+        if src_ws_styles.page_margins != _DEFAULT_PAGE_MARGINS:
+            dst_ws.page_margins = copy(src_ws_styles.page_margins)
     except Exception:
         pass
 
@@ -135,9 +324,135 @@ def find_excel_files(directory: str) -> List[str]:
     return excel_files
 
 
-def split_excel_sheets(excel_file: str, output_dir: str, keep_formulas: bool) -> int:
-    """拆分Excel文件中的所有sheet为独立文件"""
+def _save_and_close(wb, path):
+    """后台保存线程任务：save 的大头在 zlib 压缩与写盘，均释放 GIL。"""
     try:
+        wb.save(path)
+    finally:
+        wb.close()
+
+
+def _assign_output_name(sheet_name: str, used_names: dict, existing_files: set) -> str:
+    """在 used_names/existing_files 的视角下给 sheet 分配唯一输出文件名。
+    并行分发前由父进程统一调用：同名探测只在一份集合上进行，
+    子进程各自 listdir 的快照互相看不见，会静默互相覆盖。"""
+    base = sanitize_filename(sheet_name)
+    n = used_names.get(base, 0)
+    candidate = f"{base}.xlsx" if n == 0 else f"{base}_{n}.xlsx"
+    while candidate in existing_files:
+        n += 1
+        candidate = f"{base}_{n}.xlsx"
+    used_names[base] = n + 1
+    existing_files.add(candidate)
+    return candidate
+
+
+def _export_sheet(excel_file, wb_styles, zf, xml_paths, sheet_name, output_dir, keep_formulas,
+                  used_names=None, existing_files=None, saver=None, output_name=None):
+    """导出单个 sheet 为独立 xlsx。
+
+    返回 (输出文件路径, 公式数, 无缓存值公式数, 保存 future 或 None)。
+    used_names/existing_files 由调用方跨 sheet 复用：重名探测走内存集合，
+    不再对每个候选名各 stat() 一次（重名多时原 while os.path.exists 是 O(N²) 系统调用）。
+    并行场景下调用方应提前用 _assign_output_name 定好 output_name 传入，
+    本函数只在 output_name 为 None 时自行取名（串行路径）。
+    传入 saver（ThreadPoolExecutor）时，保存提交到后台线程并返回 future，
+    主线程可以继续复制下一个 sheet。
+    """
+    if output_name is None:
+        if used_names is None:
+            used_names = {}
+        if existing_files is None:
+            # 一次 listdir 摸清目录现状，跨次运行的遗留同名文件也能避开
+            try:
+                existing_files = set(os.listdir(output_dir))
+            except OSError:
+                existing_files = set()
+        output_name = _assign_output_name(sheet_name, used_names, existing_files)
+    output_file = os.path.join(output_dir, output_name)
+
+    if keep_formulas:
+        # 保留公式：整文件复制后删掉其余 sheet。
+        # 原生保留全部属性（打印设置、定义名称、透视缓存等），
+        # 且省掉 O(行×列) 的逐格复制。
+        shutil.copy(excel_file, output_file)
+        prune_wb = load_workbook(output_file)
+        for name in list(prune_wb.sheetnames):
+            if name != sheet_name:
+                del prune_wb[name]
+        prune_wb.save(output_file)
+        prune_wb.close()
+        return output_file, 0, 0, None
+
+    # 去除公式，仅保留值 + 样式（需逐格重写，无法走整文件复制）
+    src_ws_styles = wb_styles[sheet_name]
+    xml_path = xml_paths.get(sheet_name)
+    formula_cache = load_formula_cache(zf, xml_path) if xml_path else {}
+
+    # 无合并单元格/无保护的 sheet 走流式输出（write_only 增量序列化）；
+    # 其余走普通工作簿，保证合并区与保护设置完整回放
+    can_stream = (not src_ws_styles.merged_cells.ranges and
+                  not src_ws_styles.protection.sheet)
+    if can_stream:
+        new_wb = Workbook(write_only=True)
+        share_style_registries(wb_styles, new_wb)
+        new_ws = new_wb.create_sheet(title=sheet_name)
+        formula_count, missing_cached = stream_worksheet_values_and_styles(
+            formula_cache, src_ws_styles, new_ws
+        )
+    else:
+        new_wb = Workbook()
+        new_wb.remove(new_wb.active)
+        share_style_registries(wb_styles, new_wb)
+        new_ws = new_wb.create_sheet(title=sheet_name)
+        formula_count, missing_cached = copy_worksheet_values_and_styles(
+            formula_cache, src_ws_styles, new_ws
+        )
+
+    # 保存文件（有后台保存线程时异步提交，复制与压缩写盘流水线化）
+    if saver is not None:
+        fut = saver.submit(_save_and_close, new_wb, output_file)
+        return output_file, formula_count, missing_cached, fut
+    new_wb.save(output_file)
+    new_wb.close()
+    return output_file, formula_count, missing_cached, None
+
+
+def _process_one_sheet(excel_file: str, sheet_name: str, output_dir: str, keep_formulas: bool,
+                       fast_compress: bool = False, output_name: Optional[str] = None) -> str:
+    """进程池任务：自行打开工作簿并导出一个 sheet（工作簿对象不可 pickle，
+    每个子进程只能拿 (文件, sheet名) 的纯字符串参数重新加载）。
+    输出文件名由父进程在分发前用 _assign_output_name 统一定好传入，
+    并行任务各自探测重名会互相覆盖。"""
+    if fast_compress:
+        enable_fast_compress()
+    wb_styles = load_workbook(excel_file, data_only=False)
+    zf = None
+    xml_paths: Dict[str, str] = {}
+    if not keep_formulas:
+        zf = zipfile.ZipFile(excel_file)
+        xml_paths = sheet_xml_paths(zf)
+    try:
+        output_file, _, _, _ = _export_sheet(
+            excel_file, wb_styles, zf, xml_paths, sheet_name, output_dir, keep_formulas,
+            output_name=output_name
+        )
+        return os.path.basename(output_file)
+    finally:
+        wb_styles.close()
+        if zf is not None:
+            zf.close()
+
+
+def split_excel_sheets(excel_file: str, output_dir: str, keep_formulas: bool,
+                       fast_compress: bool = False,
+                       preassigned: Optional[Dict[str, str]] = None) -> int:
+    """拆分Excel文件中的所有sheet为独立文件。
+    多文件并行时父进程预先分好各 sheet 的输出文件名（preassigned：
+    sheet名 -> 文件名），避免各子进程各自探测重名时互相覆盖。"""
+    try:
+        if fast_compress:
+            enable_fast_compress()
         log(f"正在处理文件: {os.path.basename(excel_file)}")
 
         # 过滤掉 .xls（openpyxl 不支持）
@@ -145,106 +460,72 @@ def split_excel_sheets(excel_file: str, output_dir: str, keep_formulas: bool) ->
             log(f"  > 跳过 .xls 老格式：{os.path.basename(excel_file)}（建议另存为 .xlsx 再试）")
             return 0
 
-        # 加载两个工作簿：
-        # 1) 值工作簿（data_only=True）：用于拿到公式的缓存值
-        # 2) 样式工作簿（data_only=False）：用于复制样式与布局
-        if keep_formulas:
-            # 保留公式的老行为：仅打开样式工作簿，并按原来的 copy 逻辑
-            wb_styles = load_workbook(excel_file, data_only=False)
-            wb_vals = None
-        else:
-            wb_vals = load_workbook(excel_file, data_only=True)
-            wb_styles = load_workbook(excel_file, data_only=False)
+        # 只完整解析一次（样式工作簿，data_only=False）。
+        # 公式缓存值不再二次 load_workbook：按需对各 sheet 的 XML 做一遍
+        # 轻量 iterparse，仅收集公式单元格的 <v>（见 load_formula_cache）
+        wb_styles = load_workbook(excel_file, data_only=False)
+        zf: Optional[zipfile.ZipFile] = None
+        xml_paths: Dict[str, str] = {}
+        if not keep_formulas:
+            zf = zipfile.ZipFile(excel_file)
+            xml_paths = sheet_xml_paths(zf)
 
         sheet_count = 0
         sheet_names = wb_styles.sheetnames
         log(f"发现 {len(sheet_names)} 个工作表: {', '.join(sheet_names)}")
 
+        # 重名探测的内存缓存：整个文件一次 listdir，后续全走集合判断
+        used_names: dict = {}
+        try:
+            existing_files = set(os.listdir(output_dir))
+        except OSError:
+            existing_files = set()
+
+        # 后台保存线程：第 N 个 sheet 压缩写盘时主线程已在复制第 N+1 个；
+        # 在途任务限 2 个，避免内存里积压过多待写工作簿
+        saver = ThreadPoolExecutor(max_workers=2)
+        pending: deque = deque()
+
+        def _finish_save(item):
+            nonlocal sheet_count
+            fut, out_name, pending_sheet = item
+            try:
+                fut.result()
+                sheet_count += 1
+                log(f"已保存: {out_name}")
+            except Exception as e:
+                log(f"处理工作表 '{pending_sheet}' 时出错: {str(e)}")
+
         for sheet_name in tqdm(sheet_names, desc=f"拆分 {os.path.basename(excel_file)}"):
             try:
-                src_ws_styles = wb_styles[sheet_name]
-                if keep_formulas:
-                    # 旧逻辑：保留公式（只拷贝一个源）
-                    new_wb = Workbook()
-                    new_wb.remove(new_wb.active)
-                    new_ws = new_wb.create_sheet(title=sheet_name)
-
-                    # 直接逐格复制（值+样式，值可能是公式）
-                    for row in src_ws_styles.iter_rows():
-                        for cell in row:
-                            if cell.value is not None or cell.has_style:
-                                dst_cell = new_ws.cell(row=cell.row, column=cell.column)
-                                # 值：原值（可能是公式）
-                                dst_cell.value = cell.value
-                                # 样式
-                                if cell.has_style:
-                                    dst_cell.font = copy(cell.font)
-                                    dst_cell.border = copy(cell.border)
-                                    dst_cell.fill = copy(cell.fill)
-                                    dst_cell.number_format = cell.number_format
-                                    dst_cell.protection = copy(cell.protection)
-                                    dst_cell.alignment = copy(cell.alignment)
-
-                    # 复制其余布局项
-                    for col_letter, dimension in src_ws_styles.column_dimensions.items():
-                        new_ws.column_dimensions[col_letter].width = dimension.width
-                    for row_num, dimension in src_ws_styles.row_dimensions.items():
-                        new_ws.row_dimensions[row_num].height = dimension.height
-                    for merged_range in src_ws_styles.merged_cells.ranges:
-                        new_ws.merge_cells(str(merged_range))
-                    if src_ws_styles.freeze_panes:
-                        new_ws.freeze_panes = src_ws_styles.freeze_panes
-                    if src_ws_styles.auto_filter:
-                        new_ws.auto_filter.ref = src_ws_styles.auto_filter.ref
-                    try:
-                        new_ws.page_setup = copy(src_ws_styles.page_setup)
-                        new_ws.page_margins = copy(src_ws_styles.page_margins)
-                    except Exception:
-                        pass
-                    try:
-                        if src_ws_styles.protection.sheet:
-                            new_ws.protection = copy(src_ws_styles.protection)
-                    except Exception:
-                        pass
+                output_file, formula_count, missing_cached, fut = _export_sheet(
+                    excel_file, wb_styles, zf, xml_paths, sheet_name, output_dir, keep_formulas,
+                    used_names, existing_files, saver,
+                    output_name=preassigned.get(sheet_name) if preassigned else None
+                )
+                if formula_count > 0 and missing_cached > 0:
+                    log(f"  > 提示：工作表 '{sheet_name}' 中有 {missing_cached}/{formula_count} 个公式无缓存值（可能从未在Excel/WPS中计算过），导出处将为空。")
 
+                if fut is None:
+                    sheet_count += 1
+                    log(f"已保存: {os.path.basename(output_file)}")
                 else:
-                    # 新逻辑：去除公式，仅保留值 + 样式
-                    src_ws_vals = wb_vals[sheet_name]
-                    new_wb = Workbook()
-                    new_wb.remove(new_wb.active)
-                    new_ws = new_wb.create_sheet(title=sheet_name)
-
-                    formula_count, missing_cached = copy_worksheet_values_and_styles(
-                        src_ws_vals, src_ws_styles, new_ws
-                    )
-                    if formula_count > 0 and missing_cached > 0:
-                        log(f"  > 提示：工作表 '{sheet_name}' 中有 {missing_cached}/{formula_count} 个公式无缓存值（可能从未在Excel/WPS中计算过），导出处将为空。")
-
-                # 生成输出文件名
-                safe_sheet_name = sanitize_filename(sheet_name)
-                output_file = os.path.join(output_dir, f"{safe_sheet_name}.xlsx")
-                counter = 1
-                original_output_file = output_file
-                while os.path.exists(output_file):
-                    name_without_ext = os.path.splitext(original_output_file)[0]
-                    output_file = f"{name_without_ext}_{counter}.xlsx"
-                    counter += 1
-
-                # 保存文件
-                new_wb.save(output_file)
-                new_wb.close()
-
-                sheet_count += 1
-                log(f"已保存: {os.path.basename(output_file)}")
+                    pending.append((fut, os.path.basename(output_file), sheet_name))
+                    if len(pending) >= 2:
+                        _finish_save(pending.popleft())
 
             except Exception as e:
                 log(f"处理工作表 '{sheet_name}' 时出错: {str(e)}")
                 continue
 
+        while pending:
+            _finish_save(pending.popleft())
+        saver.shutdown()
+
         # 关闭
         wb_styles.close()
-        if not keep_formulas and wb_vals is not None:
-            wb_vals.close()
+        if zf is not None:
+            zf.close()
 
         return sheet_count
 
@@ -258,10 +539,15 @@ def main():
     try:
         parser = argparse.ArgumentParser(description="Excel Sheet 拆分（去除公式，仅保留值）")
         parser.add_argument("--keep-formulas", action="store_true", help="保留公式（默认去除公式，仅保留值）")
+        parser.add_argument("--jobs", type=int, default=1,
+                            help="按 (文件, sheet) 粒度并行导出的进程数（默认 1：单文件串行，多文件按文件并行）")
+        parser.add_argument("--fast-compress", action="store_true",
+                            help="用 zlib 级别 1 压缩输出（保存快约 3 倍，文件大 5-10%%）")
         args = parser.parse_args()
 
         log("Excel Sheet 拆分工具启动")
         log(f"当前工作目录: {os.getcwd()}")
+        log(f"XML 后端: {'lxml（C 加速）' if _HAS_LXML else 'xml.etree（纯 Python，装 lxml 可提速约 2 倍）'}")
         if args.keep_formulas:
             log("模式：保留公式（与旧版一致）")
         else:
@@ -282,22 +568,108 @@ def main():
         os.makedirs(output_dir, exist_ok=True)
         log(f"输出目录: {output_dir}")
 
-        # 处理每个Excel文件
+        # 处理每个Excel文件：
+        # 各文件的 XML 解析/序列化互相独立且是 CPU 密集，多文件时用进程池并行；
+        # 单文件保持串行，省掉子进程开销且日志顺序不变
         total_sheets = 0
         successful_files = 0
 
-        for excel_file in excel_files:
+        if args.jobs > 1:
+            # sheet 级并行：把每个 (文件, sheet) 对作为独立任务分发，
+            # 粒度比按文件并行更细，单个大工作簿也能吃满核
+            # 输出文件名在分发前由父进程统一预分配（见 _assign_output_name），
+            # 避免并行任务各自 listdir 后对同名 sheet 取到相同文件名互相覆盖
+            used_names: dict = {}
             try:
-                sheet_count = split_excel_sheets(excel_file, output_dir, keep_formulas=args.keep_formulas)
-                if sheet_count > 0:
-                    total_sheets += sheet_count
-                    successful_files += 1
-                    log(f"文件 '{os.path.basename(excel_file)}' 处理完成，拆分了 {sheet_count} 个工作表")
-                else:
-                    log(f"文件 '{os.path.basename(excel_file)}' 处理失败或无可拆分工作表")
-            except Exception as e:
-                log(f"处理文件 '{os.path.basename(excel_file)}' 时发生错误: {str(e)}")
-                continue
+                existing_files = set(os.listdir(output_dir))
+            except OSError:
+                existing_files = set()
+            pairs = []
+            for excel_file in excel_files:
+                if excel_file.lower().endswith(".xls"):
+                    log(f"  > 跳过 .xls 老格式：{os.path.basename(excel_file)}（建议另存为 .xlsx 再试）")
+                    continue
+                try:
+                    wb_ro = load_workbook(excel_file, read_only=True)
+                    names = wb_ro.sheetnames
+                    wb_ro.close()
+                except Exception as e:
+                    log(f"处理文件 '{os.path.basename(excel_file)}' 时出错: {str(e)}")
+                    continue
+                pairs.extend((excel_file, name,
+                              _assign_output_name(name, used_names, existing_files))
+                             for name in names)
+
+            log(f"sheet 级并行处理（{args.jobs} 进程，共 {len(pairs)} 个任务）")
+            per_file_counts: dict = {}
+            with ProcessPoolExecutor(max_workers=args.jobs) as ex:
+                futs = {ex.submit(_process_one_sheet, f, s, output_dir, args.keep_formulas,
+                                  args.fast_compress, out_name): (f, s)
+                        for f, s, out_name in pairs}
+                for fut in tqdm(as_completed(futs), total=len(futs), desc="拆分"):
+                    excel_file, sheet_name = futs[fut]
+                    try:
+                        out_name = fut.result()
+                        per_file_counts[excel_file] = per_file_counts.get(excel_file, 0) + 1
+                        total_sheets += 1
+                        log(f"已保存: {out_name}")
+                    except Exception as e:
+                        log(f"处理工作表 '{sheet_name}' 时出错: {str(e)}")
+            successful_files = sum(1 for c in per_file_counts.values() if c > 0)
+
+        elif len(excel_files) > 1:
+            workers = min(os.cpu_count() or 1, len(excel_files))
+            log(f"多文件并行处理（{workers} 进程）")
+            # 输出文件名由父进程统一预分配：不同文件里常有同名 sheet
+            # （Sheet1/汇总…），放任各子进程自行探测会互相覆盖
+            used_names: dict = {}
+            try:
+                existing_files = set(os.listdir(output_dir))
+            except OSError:
+                existing_files = set()
+            assigned: Dict[str, Optional[Dict[str, str]]] = {}
+            for excel_file in excel_files:
+                try:
+                    wb_ro = load_workbook(excel_file, read_only=True)
+                    names = wb_ro.sheetnames
+                    wb_ro.close()
+                except Exception:
+                    assigned[excel_file] = None  # 打不开的交给子进程自己报错
+                    continue
+                assigned[excel_file] = {
+                    name: _assign_output_name(name, used_names, existing_files)
+                    for name in names}
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futs = {ex.submit(split_excel_sheets, f, output_dir, args.keep_formulas,
+                                  args.fast_compress, assigned.get(f)): f
+                        for f in excel_files}
+                for fut in as_completed(futs):
+                    excel_file = futs[fut]
+                    try:
+                        sheet_count = fut.result()
+                        if sheet_count > 0:
+                            total_sheets += sheet_count
+                            successful_files += 1
+                            log(f"文件 '{os.path.basename(excel_file)}' 处理完成，拆分了 {sheet_count} 个工作表")
+                        else:
+                            log(f"文件 '{os.path.basename(excel_file)}' 处理失败或无可拆分工作表")
+                    except Exception as e:
+                        log(f"处理文件 '{os.path.basename(excel_file)}' 时发生错误: {str(e)}")
+        else:
+            for excel_file in excel_files:
+                try:
+                    sheet_count = split_excel_sheets(excel_file, output_dir,
+                                                     keep_formulas=args.keep_formulas,
+                                                     fast_compress=args.fast_compress)
+                    if sheet_count > 0:
+                        total_sheets += sheet_count
+                        successful_files += 1
+                        log(f"文件 '{os.path.basename(excel_file)}' 处理完成，拆分了 {sheet_count} 个工作表")
+                    else:
+                        log(f"文件 '{os.path.basename(excel_file)}' 处理失败或无可拆分工作表")
+                except Exception as e:
+                    log(f"处理文件 '{os.path.basename(excel_file)}' 时发生错误: {str(e)}")
+                    continue
 
         # 输出总结
         log("\n=== 处理完成 ===")
@@ -317,6 +689,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # pyinstaller 冻结后 Windows spawn 的子进程会重新执行入口脚本，
+    # 不调 freeze_support 进程池会无限递归拉起新进程
+    multiprocessing.freeze_support()
     try:
         main()
     except KeyboardInterrupt:
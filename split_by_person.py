@@ -21,23 +21,36 @@ Excel 汇总表一键「按人拆分 + 校验」工具（带进度条，保留
 """
 import argparse
 import os
-import re
 import sys
-import hashlib
 import numbers
 import datetime as dt
-from collections import OrderedDict, Counter
-from copy import copy
+from collections import OrderedDict, Counter, defaultdict, deque
 import datetime as _dt
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import Optional, List, Dict
 
 from openpyxl import load_workbook, Workbook
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import PatternFill, Font
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-DEFAULT_NAME_KEYS = ["销售员","姓名","员工","人员","负责人","Name","name"]
+# 可选加速：pandas>=2.2 原生支持 calamine（Rust 解析器）作为 read_excel 引擎，
+# 读值比默认 openpyxl 引擎快 5–20 倍，且只解析值——正契合校验阶段的语义；
+# 未安装时退回默认引擎
+try:
+    import python_calamine  # noqa: F401
+    _EXCEL_ENGINE: Optional[str] = "calamine"
+except ImportError:
+    _EXCEL_ENGINE = None
+
+from _excel_common import (_TRAILING_SUMMARY_RE,
+                           append_styled_row, base_name, detect_name_col,
+                           detect_sheet, replay_header_and_dimensions,
+                           sanitize_filename, snapshot_column_styles,
+                           snapshot_header_and_dimensions)
 
 
 # ----------------- 日志与通用 -----------------
@@ -55,142 +68,123 @@ def find_default_excel() -> Optional[str]:
     return None
 
 
-def detect_sheet(wb, sheet):
-    if sheet is None:
-        return wb.worksheets[0]
-    if isinstance(sheet, str):
-        if sheet.isdigit():
-            idx = int(sheet)
-            return wb.worksheets[idx]
-        if sheet in wb.sheetnames:
-            return wb[sheet]
-    if isinstance(sheet, int):
-        return wb.worksheets[sheet]
-    return wb.worksheets[0]
-
-
-def detect_name_col(header_cells: List[str], manual: Optional[str]=None) -> str:
-    if manual and manual in header_cells:
-        return manual
-    for key in DEFAULT_NAME_KEYS:
-        if key in header_cells:
-            return key
-    for c in header_cells:
-        if any(key in c for key in DEFAULT_NAME_KEYS):
-            return c
-    return header_cells[0]
-
-
-def base_name(s) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip()
-    s = re.sub(r"\s*汇总$", "", s)  # 去掉“ 汇总”后缀
-    return s.strip()
-
-
-def sanitize_filename(name: str) -> str:
-    return re.sub(r'[\\/:*?"<>|]', "_", name)
-
-
-# ----------------- 样式复制 -----------------
-def copy_cell(src, dst):
-    """复制单元格的值与样式（字体、对齐、边框、填充、数字格式、保护）。"""
-    dst.value = src.value
-    if src.has_style:
-        dst.font = copy(src.font)
-        dst.border = copy(src.border)
-        dst.fill = copy(src.fill)
-        dst.number_format = src.number_format
-        dst.protection = copy(src.protection)
-        dst.alignment = copy(src.alignment)
-
-
-def copy_header_and_dimensions(src_ws, dst_ws, header_row=1):
-    """复制列宽、表头样式、行高、冻结窗格。"""
-    for col_letter, dim in src_ws.column_dimensions.items():
-        nd = dst_ws.column_dimensions[col_letter]
-        nd.width = dim.width
-        nd.hidden = dim.hidden
-        nd.bestFit = dim.bestFit
-    # 表头（源 header_row -> 目标第 1 行）
-    for col in range(1, src_ws.max_column + 1):
-        sc = src_ws.cell(row=header_row, column=col)
-        dc = dst_ws.cell(row=1, column=col)
-        copy_cell(sc, dc)
-    # 行高
-    try:
-        dst_ws.row_dimensions[1].height = src_ws.row_dimensions[header_row].height
-    except Exception:
-        pass
-    # 冻结窗格（如 A2）
-    dst_ws.freeze_panes = src_ws.freeze_panes
+# ----------------- 拆分 -----------------
+def read_excel_values(path: str, sheet_name=0) -> pd.DataFrame:
+    """校验阶段的整表读取：优先 calamine 引擎，异常或未安装时退回默认引擎。"""
+    if _EXCEL_ENGINE:
+        try:
+            return pd.read_excel(path, sheet_name=sheet_name, engine=_EXCEL_ENGINE)
+        except Exception:
+            pass
+    return pd.read_excel(path, sheet_name=sheet_name)
 
 
-def write_row_from_src(src_ws, dst_ws, src_row_idx, dst_row_idx):
-    """按列逐格复制一整行（值+样式）。"""
-    for col in range(1, src_ws.max_column + 1):
-        sc = src_ws.cell(row=src_row_idx, column=col)
-        dc = dst_ws.cell(row=dst_row_idx, column=col)
-        copy_cell(sc, dc)
+def probe_header(in_path: str, sheet_sel) -> List[str]:
+    """只读第 1 行拿表头：read_only 流式打开，不触发整本解析。
+    用于在昂贵的完整加载之前就校验姓名列。"""
+    wb_ro = load_workbook(in_path, read_only=True, data_only=True)
+    try:
+        ws_ro = detect_sheet(wb_ro, sheet_sel)
+        first = next(ws_ro.iter_rows(min_row=1, max_row=1, values_only=True), None)
+    finally:
+        wb_ro.close()
+    return [str(v).strip() if v is not None else "" for v in (first or ())]
+
+
+def _build_and_save_one(out_dir: str, person: str, rows: list,
+                        header_snapshot, col_styles, last_col_letter: str):
+    """把一个人的行值列表写成独立 xlsx。
+    只接收值列表 + 样式快照（均可 pickle），不传活的 Worksheet 对象，
+    因此既能在本进程串行调用，也能原样提交给进程池。"""
+    wb2 = Workbook(write_only=True)
+    ws2 = wb2.create_sheet(title=person or "未命名")
+    replay_header_and_dimensions(ws2, *header_snapshot)
+    for row_vals in rows:
+        append_styled_row(ws2, row_vals, col_styles)
+    ws2.auto_filter.ref = f"A1:{last_col_letter}{len(rows) + 1}"
+    safe = sanitize_filename(person) or "未命名"
+    out_path = os.path.join(out_dir, f"{safe}.xlsx")
+    wb2.save(out_path)
+    return out_path
 
 
-# ----------------- 拆分 -----------------
 def split_excel(in_path: str, sheet_sel, name_col_manual: Optional[str],
-                out_dir: str, keep_empty: bool, pbar: tqdm):
-    wb = load_workbook(in_path, data_only=True)
-    ws = detect_sheet(wb, sheet_sel)
-
-    # 表头
-    header = [str(c.value).strip() if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
+                out_dir: str, keep_empty: bool, pbar: tqdm, jobs: int = 1):
+    # 先用只读探针校验表头/姓名列，指定了错误的 --name-col 时在完整加载前就报错
+    header = probe_header(in_path, sheet_sel)
     if not header or all(not h for h in header):
         raise RuntimeError("无法读取表头（第 1 行为空）。")
+    if name_col_manual and name_col_manual not in header:
+        raise RuntimeError(f"未找到姓名列：{name_col_manual}")
     name_col = detect_name_col(header, name_col_manual)
     try:
         name_col_idx = header.index(name_col) + 1
     except ValueError:
         raise RuntimeError(f"未找到姓名列：{name_col}")
 
-    books: Dict[str, Dict] = OrderedDict()
-    header_row_idx = 1
+    # 第一遍：普通模式只为快照表头样式/列宽/冻结窗格与数据行列样式，
+    # 快照完成立即释放整棵 Cell 树
+    wb = load_workbook(in_path, data_only=True)
+    ws = detect_sheet(wb, sheet_sel)
+    max_col = ws.max_column
+    header_snapshot = snapshot_header_and_dimensions(ws, header_row=1)
+    col_styles = snapshot_column_styles(ws, row=2)
+    wb.close()
+
+    # 第二遍：read_only 流式读数据行（SAX 解析，逐行产出值元组），
+    # 分组期间内存里只有各人员的行值列表，没有任何 Cell 对象
+    wb_ro = load_workbook(in_path, read_only=True, data_only=True)
+    ws_ro = detect_sheet(wb_ro, sheet_sel)
+    max_row = ws_ro.max_row
 
     # 拆分进度条：数据行数
-    total_rows = ws.max_row - 1 if ws.max_row > 1 else 0
+    total_rows = max_row - 1 if max_row > 1 else 0
     pbar.reset(total=total_rows)
     pbar.set_description("拆分中")
 
-    for r in range(2, ws.max_row + 1):
-        person_raw = ws.cell(row=r, column=name_col_idx).value
-        person = base_name(person_raw)
-        if not person and not keep_empty:
-            pbar.update(1)
-            continue
-
-        if person not in books:
-            new_wb = Workbook()
-            new_ws = new_wb.active
-            new_ws.title = person or "未命名"
-            copy_header_and_dimensions(ws, new_ws, header_row=header_row_idx)
-            books[person] = {"wb": new_wb, "ws": new_ws}
-
-        dst_ws = books[person]["ws"]
-        dst_next_row = dst_ws.max_row + 1
-        write_row_from_src(ws, dst_ws, r, dst_next_row)
+    # 单遍扫描把每个人的行（值元组）按出现顺序收集到一起。
+    # 同一姓名在名列里出现成千上万次，base_name 的 strip+正则只对
+    # 每个不同原始值算一次，其余命中字典
+    groups: Dict[str, list] = OrderedDict()
+    name_cache: Dict = {}
+    for row_vals in ws_ro.iter_rows(min_row=2, values_only=True):
+        person_raw = row_vals[name_col_idx - 1] if len(row_vals) >= name_col_idx else None
+        person = name_cache.get(person_raw)
+        if person is None:
+            person = name_cache[person_raw] = base_name(person_raw)
+        if person or keep_empty:
+            groups.setdefault(person, []).append(row_vals)
         pbar.update(1)
 
-    # 保存阶段
-    save_bar = tqdm(total=len(books), desc="保存文件", leave=False)
-    for person, info in books.items():
-        wb2, ws2 = info["wb"], info["ws"]
-        last_col_letter = get_column_letter(ws2.max_column)
-        ws2.auto_filter.ref = f"A1:{last_col_letter}{ws2.max_row}"
-        safe = sanitize_filename(person) or "未命名"
-        out_path = os.path.join(out_dir, f"{safe}.xlsx")
-        wb2.save(out_path)
-        save_bar.update(1)
+    wb_ro.close()
+
+    # 拆分时顺手为每人算好“标准化元组计数”：校验阶段据此直接对账，
+    # 不必为拿期望行集合把汇总表再整表解析、分组一遍
+    split_counters = {person: Counter(
+        _fingerprint_raw_row(row_vals, max_col)
+        for row_vals in rows) for person, rows in groups.items()}
+
+    # 保存阶段：每人一个 write_only 工作簿，行直接流式写入 ZIP，
+    # 不再为每个人在内存里维护一棵完整 Cell 树。
+    # 各人员文件彼此独立：--jobs>1 用进程池真正并行（XML 序列化是
+    # 纯 Python、受 GIL 限制）；默认也用小线程池——zlib 压缩和磁盘写
+    # 会释放 GIL，一个文件压缩/落盘时另一线程可以生成下一个的 XML
+    last_col_letter = get_column_letter(max_col)
+    save_bar = tqdm(total=len(groups), desc="保存文件", leave=False)
+    if jobs > 1 and len(groups) > 1:
+        pool_cls, workers = ProcessPoolExecutor, min(jobs, len(groups))
+    else:
+        pool_cls, workers = ThreadPoolExecutor, min(4, os.cpu_count() or 1, max(1, len(groups)))
+    with pool_cls(max_workers=workers) as ex:
+        futures = [ex.submit(_build_and_save_one, out_dir, person, rows,
+                             header_snapshot, col_styles, last_col_letter)
+                   for person, rows in groups.items()]
+        for fut in as_completed(futures):
+            fut.result()
+            save_bar.update(1)
     save_bar.close()
 
-    return list(books.keys()), header
+    return list(groups.keys()), header, split_counters
 
 
 # ----------------- 校验（标准化 + 指纹 + 计数） -----------------
@@ -226,45 +220,151 @@ def canon(v):
     return str(v).strip()
 
 
-def row_fingerprint(series: pd.Series) -> str:
-    parts = [canon(v) for v in series.tolist()]
-    joined = "\x1f".join(parts)
-    return hashlib.md5(joined.encode("utf-8")).hexdigest()
+def canon_series(s: pd.Series) -> pd.Series:
+    """canon() 的整列向量化版本：按列 dtype 只分支一次，内部走 pandas 的 C 内核；
+    混合类型的 object 列退回逐元素 canon()，语义与逐格处理完全一致。"""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        midnight = ((s.dt.hour == 0) & (s.dt.minute == 0)
+                    & (s.dt.second == 0) & (s.dt.microsecond == 0))
+        out = s.dt.strftime("%Y-%m-%d %H:%M:%S").where(~midnight,
+                                                       s.dt.strftime("%Y-%m-%d"))
+        return out.fillna("")
+    if pd.api.types.is_numeric_dtype(s):
+        # 数值列整列下沉到 numpy：near-zero 归零 + %.15g 批量格式化，
+        # 每个值不再回落 Python 的 isna 判断和 f-string
+        try:
+            a = s.to_numpy(dtype="float64", na_value=np.nan)
+        except (TypeError, ValueError):
+            nums = s.where((s.abs() >= 1e-12) | s.isna(), 0)  # NaN 保留，后面统一归空串
+            return nums.map(lambda v: "" if pd.isna(v) else f"{v:.15g}")
+        a = np.where(np.abs(a) < 1e-12, 0.0, a)
+        out = np.char.mod("%.15g", a).astype(object)
+        out[np.isnan(a)] = ""
+        return pd.Series(out, index=s.index)
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        return s.fillna("").astype(str).str.strip()
+    return s.map(canon)
+
+
+def _row_key(parts) -> tuple:
+    """标准化行 -> 指纹元组，去掉行尾空串再定宽：openpyxl 按表宽补齐尾列、
+    pandas 可能整列丢掉全空尾列，截掉尾部空串后两种来源的行宽才可比。"""
+    i = len(parts)
+    while i and parts[i - 1] == "":
+        i -= 1
+    return tuple(parts[:i])
+
+
+def frame_fingerprints(df: pd.DataFrame) -> list:
+    """整个 DataFrame 的行指纹：先按列一次性标准化（代替 df.apply 逐行逐格），
+    再按行组成元组直接作 Counter 键——短字符串元组的哈希是 CPython 的
+    C 级快路径，比每行跑一遍 MD5 便宜一个量级，计数比较语义不变。"""
+    canon_cols = [canon_series(s).tolist() for _, s in df.items()]
+    return [_row_key(t) for t in zip(*canon_cols)]
+
+
+def _fingerprint_raw_row(row_vals, ncols: int) -> tuple:
+    """openpyxl 原始行元组 -> 指纹元组（拆分侧与回读侧共用同一套 canon）。"""
+    return _row_key([canon(v) for v in row_vals[:ncols]])
+
+
+def _pad_row(row_vals, ncols: int) -> list:
+    """原始行元组对齐到表头宽度（导出差异明细用）。"""
+    row = list(row_vals[:ncols])
+    row.extend([None] * (ncols - len(row)))
+    return row
+
+
+def read_rows_openpyxl(path: str, sheet_sel=None) -> list:
+    """read_only 流式读数据行（第 2 行起）的原始值元组。
+    校验快路径用它回读输出文件：与拆分侧同一条 openpyxl 读路，
+    避免 pd.read_excel 的类型推断（数字样文本 "007" -> 7）只作用于一侧。"""
+    wb_ro = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws_ro = detect_sheet(wb_ro, sheet_sel)
+        return list(ws_ro.iter_rows(min_row=2, values_only=True))
+    finally:
+        wb_ro.close()
 
 
 def build_person_map(df: pd.DataFrame, name_col: str) -> Dict[str, pd.DataFrame]:
-    df = df.copy()
-    df["_base_name"] = df[name_col].apply(base_name)
-    return { p: sub.drop(columns=["_base_name"]) for p, sub in df.groupby("_base_name") if p }
-
-
-def validate_output(sum_path: str, out_dir: str, sheet_sel, name_col_manual: Optional[str],
-                    report_xlsx_path: str, vbar: tqdm, dump_diff: bool=False):
-    # 读汇总
+    # base_name 的向量化版本：str 访问器全程走 pandas 的 C 实现，
+    # 不再对每行 .apply() 回落 Python；NaN 统一归空串（与 base_name(None) 一致）
+    base = (df[name_col].astype("string")
+            .str.strip()
+            .str.replace(_TRAILING_SUMMARY_RE, "", regex=True)
+            .str.strip()
+            .fillna(""))
+    # 用外部 key 分组，省掉临时列的拷贝与删除；sort=False 保持首次出现顺序
+    return {p: sub for p, sub in df.groupby(base.to_numpy(), sort=False) if p}
+
+
+def _read_summary(sum_path: str, sheet_sel) -> pd.DataFrame:
+    """按 -s 参数读汇总表，列名统一去空格。"""
     if sheet_sel is None:
-        df_sum = pd.read_excel(sum_path)
+        df_sum = read_excel_values(sum_path)
     else:
         try:
             if str(sheet_sel).isdigit():
-                df_sum = pd.read_excel(sum_path, sheet_name=int(sheet_sel))
+                df_sum = read_excel_values(sum_path, sheet_name=int(sheet_sel))
             else:
-                df_sum = pd.read_excel(sum_path, sheet_name=sheet_sel)
+                df_sum = read_excel_values(sum_path, sheet_name=sheet_sel)
         except Exception:
-            df_sum = pd.read_excel(sum_path)
-
+            df_sum = read_excel_values(sum_path)
     df_sum.columns = [str(c).strip() for c in df_sum.columns]
-    name_col = detect_name_col(df_sum.columns.tolist(), name_col_manual)
+    return df_sum
 
-    src_map = build_person_map(df_sum, name_col)
+
+def validate_output(sum_path: str, out_dir: str, sheet_sel, name_col_manual: Optional[str],
+                    report_xlsx_path: str, vbar: tqdm, dump_diff: bool=False,
+                    split_header: Optional[List[str]] = None,
+                    split_counters: Optional[Dict[str, Counter]] = None):
+    """对照汇总表校验输出目录。
+    拆分流程会把拆分时算好的表头与每人标准化计数传进来（split_header /
+    split_counters），此时省掉汇总表的整表重读与重新分组，只回读各输出
+    文件对账；仅 --dump-diff 需要差异行明细时才懒加载汇总表。
+    单独调用（不传计数）时保持原先的全量对比行为。"""
+    src_map: Optional[Dict[str, pd.DataFrame]] = None
+    if split_counters is not None and split_header is not None:
+        header_cols = [str(c).strip() for c in split_header]
+        ncols = len(header_cols)
+        expected = OrderedDict((p, c) for p, c in split_counters.items() if p)
+        persons = list(expected)
+    else:
+        df_sum = _read_summary(sum_path, sheet_sel)
+        name_col = detect_name_col(df_sum.columns.tolist(), name_col_manual)
+        src_map = build_person_map(df_sum, name_col)
+        header_cols, expected = None, None
+        persons = list(src_map)
+
+    src_rows_map: Optional[Dict[str, list]] = None
+
+    def load_src_rows() -> Dict[str, list]:
+        # 快路径的差异明细需要具体行值，此时才回读汇总表——用与拆分
+        # 相同的 read_only 流式读 + base_name 分组，指纹键才对得上
+        nonlocal src_rows_map
+        if src_rows_map is None:
+            name_col = detect_name_col(header_cols, name_col_manual)
+            idx = header_cols.index(name_col)
+            src_rows_map = {}
+            cache: Dict = {}
+            for row_vals in read_rows_openpyxl(sum_path, sheet_sel):
+                raw = row_vals[idx] if len(row_vals) > idx else None
+                person = cache.get(raw)
+                if person is None:
+                    person = cache[raw] = base_name(raw)
+                if person:
+                    src_rows_map.setdefault(person, []).append(row_vals)
+        return src_rows_map
 
     files = [f for f in os.listdir(out_dir) if f.lower().endswith(".xlsx")]
     people_in_files = [os.path.splitext(f)[0] for f in files]
 
     rows = []
-    vbar.reset(total=len(src_map))
+    vbar.reset(total=len(persons))
     vbar.set_description("校验中")
 
-    for p, src_df in src_map.items():
+    for p in persons:
         fname = None
         if p in people_in_files:
             fname = os.path.join(out_dir, f"{p}.xlsx")
@@ -277,60 +377,109 @@ def validate_output(sum_path: str, out_dir: str, sheet_sel, name_col_manual: Opt
             vbar.update(1)
             continue
 
-        dst_df = pd.read_excel(fname)
-        dst_df.columns = [str(c).strip() for c in dst_df.columns]
+        # 列头 + 数据行读取。快路径整条用拆分同款 openpyxl 读路回读：
+        # pd.read_excel 会把数字样文本（工号 "007"）推断成数字、改写
+        # 重复/空列名，只作用于 dst 一侧就会把正确的拆分误报成 FAIL
+        if expected is not None:
+            # 尾部空表头格两边都截掉再比：write_only 不落盘 None 尾格，
+            # 输出文件的首行可能比源表头短一截空串
+            if _row_key(probe_header(fname, None)) != _row_key(header_cols):
+                rows.append({"person": p, "status": "FAIL", "detail": "列头不一致"})
+                vbar.update(1)
+                continue
+            src_cnt: Optional[Counter] = expected[p]
+            n_src = sum(src_cnt.values())
+            dst_raw = read_rows_openpyxl(fname)
+            n_dst = len(dst_raw)
+        else:
+            dst_df = read_excel_values(fname)
+            dst_df.columns = [str(c).strip() for c in dst_df.columns]
+            if list(src_map[p].columns) != list(dst_df.columns):
+                rows.append({"person": p, "status": "FAIL", "detail": "列头不一致"})
+                vbar.update(1)
+                continue
+            src_cnt = None  # 懒算，行数相同才值得整表指纹
+            n_src = len(src_map[p])
+            n_dst = len(dst_df)
 
-        # 列头
-        if list(src_df.columns) != list(dst_df.columns):
-            rows.append({"person": p, "status": "FAIL", "detail": "列头不一致"})
+        # 行数先对一遍：批量丢行/多行时 O(1) 就能定性，
+        # 不必对两边做整表标准化。--dump-diff 需要行明细，仍走完整对比
+        if n_dst != n_src and not dump_diff:
+            rows.append({"person": p, "status": "FAIL",
+                         "detail": f"行数不一致（src={n_src}, dst={n_dst}）"})
             vbar.update(1)
             continue
 
         # 指纹 + 计数（支持重复行）
-        src_fp = src_df.apply(row_fingerprint, axis=1).tolist()
-        dst_fp = dst_df.apply(row_fingerprint, axis=1).tolist()
-        src_cnt = Counter(src_fp)
+        if expected is not None:
+            dst_fp = [_fingerprint_raw_row(r, ncols) for r in dst_raw]
+        else:
+            dst_fp = frame_fingerprints(dst_df)
         dst_cnt = Counter(dst_fp)
+        if src_cnt is None:
+            src_cnt = Counter(frame_fingerprints(src_map[p]))
 
         if src_cnt == dst_cnt:
-            rows.append({"person": p, "status": "OK", "detail": f"行数={len(src_fp)} 完全一致"})
+            rows.append({"person": p, "status": "OK", "detail": f"行数={n_src} 完全一致"})
         else:
-            missing = sum((src_cnt - dst_cnt).values())
-            extra   = sum((dst_cnt - src_cnt).values())
+            # 一次遍历键并集同时得出两侧差异
+            # （代替 src_cnt-dst_cnt / dst_cnt-src_cnt 各建一个临时 Counter 再各遍历一次）
+            missing = extra = 0
+            src_only_keys: list = []
+            dst_only_keys: list = []
+            for k in src_cnt.keys() | dst_cnt.keys():
+                d = src_cnt[k] - dst_cnt[k]
+                if d > 0:
+                    missing += d
+                    src_only_keys.extend([k] * d)
+                elif d < 0:
+                    extra -= d
+                    dst_only_keys.extend([k] * -d)
             rows.append({"person": p, "status": "FAIL",
-                         "detail": f"不一致：缺少{missing}行，多出{extra}行（src={len(src_fp)}, dst={len(dst_fp)}）"})
+                         "detail": f"不一致：缺少{missing}行，多出{extra}行（src={n_src}, dst={len(dst_fp)}）"})
             if dump_diff:
-                # 导出差异明细
-                src_df2 = src_df.copy()
-                dst_df2 = dst_df.copy()
-                src_df2["_fp"] = src_df2.apply(row_fingerprint, axis=1)
-                dst_df2["_fp"] = dst_df2.apply(row_fingerprint, axis=1)
-
-                src_only_keys = list((src_cnt - dst_cnt).elements())
-                dst_only_keys = list((dst_cnt - src_cnt).elements())
+                # 导出差异明细：先把 指纹->行号队列 一次建好，
+                # 每个差异键 O(1) 弹出对应行，代替原来逐键整列布尔扫描 + drop。
+                # 差异键来自哪侧读路，行定位就必须用同侧指纹，否则键对不上、
+                # 明细导出为空
+                if expected is not None:
+                    src_raw = load_src_rows().get(p, [])
+                    src_fp = [_fingerprint_raw_row(r, ncols) for r in src_raw]
+                    take_src = lambda i: _pad_row(src_raw[i], ncols)
+                    take_dst = lambda i: _pad_row(dst_raw[i], ncols)
+                    diff_columns = header_cols
+                else:
+                    src_df2 = src_map[p]
+                    src_fp = frame_fingerprints(src_df2)
+                    take_src = lambda i: src_df2.iloc[i]
+                    take_dst = lambda i: dst_df.iloc[i]
+                    diff_columns = None
+
+                src_pos: Dict[tuple, deque] = defaultdict(deque)
+                for i, fp in enumerate(src_fp):
+                    src_pos[fp].append(i)
+                dst_pos: Dict[tuple, deque] = defaultdict(deque)
+                for i, fp in enumerate(dst_fp):
+                    dst_pos[fp].append(i)
 
                 src_only_rows = []
                 for k in src_only_keys:
-                    idx = src_df2.index[src_df2["_fp"] == k]
-                    if len(idx):
-                        r = src_df2.loc[idx[0]].drop(labels="_fp")
-                        src_only_rows.append(r)
-                        src_df2 = src_df2.drop(index=idx[0])
+                    q = src_pos.get(k)
+                    if q:
+                        src_only_rows.append(take_src(q.popleft()))
 
                 dst_only_rows = []
                 for k in dst_only_keys:
-                    idx = dst_df2.index[dst_df2["_fp"] == k]
-                    if len(idx):
-                        r = dst_df2.loc[idx[0]].drop(labels="_fp")
-                        dst_only_rows.append(r)
-                        dst_df2 = dst_df2.drop(index=idx[0])
+                    q = dst_pos.get(k)
+                    if q:
+                        dst_only_rows.append(take_dst(q.popleft()))
 
                 if src_only_rows:
-                    pd.DataFrame(src_only_rows).to_csv(
+                    pd.DataFrame(src_only_rows, columns=diff_columns).to_csv(
                         os.path.join(out_dir, f"diff_{sanitize_filename(p)}_src_only.csv"),
                         index=False, encoding="utf-8-sig")
                 if dst_only_rows:
-                    pd.DataFrame(dst_only_rows).to_csv(
+                    pd.DataFrame(dst_only_rows, columns=diff_columns).to_csv(
                         os.path.join(out_dir, f"diff_{sanitize_filename(p)}_dst_only.csv"),
                         index=False, encoding="utf-8-sig")
 
@@ -377,6 +526,7 @@ def main():
     ap.add_argument("--keep-empty", action="store_true", help="保留姓名为空的行（默认不保留）")
     ap.add_argument("--no-validate", action="store_true", help="只拆分不校验")
     ap.add_argument("--dump-diff", action="store_true", help="校验失败时导出差异明细 CSV（src_only/dst_only）")
+    ap.add_argument("--jobs", type=int, default=1, help="保存阶段并行进程数（默认 1=串行；人多时可设为 CPU 核数）")
     args = ap.parse_args()
 
     in_path = args.input or find_default_excel()
@@ -392,7 +542,8 @@ def main():
 
     # 拆分
     with tqdm(total=0, leave=True) as pbar:
-        people, _ = split_excel(in_path, args.sheet, args.name_col, out_dir, args.keep_empty, pbar)
+        people, header, split_counters = split_excel(in_path, args.sheet, args.name_col, out_dir,
+                                                     args.keep_empty, pbar, jobs=max(1, args.jobs))
 
     log(f"拆分完成，共生成 {len(people)} 个文件。")
 
@@ -403,7 +554,9 @@ def main():
     # 仅生成 Excel 报告
     report_xlsx = os.path.join(out_dir, "验证报告.xlsx")
     with tqdm(total=0, leave=True) as vbar:
-        rep = validate_output(in_path, out_dir, args.sheet, args.name_col, report_xlsx, vbar, dump_diff=args.dump_diff)
+        rep = validate_output(in_path, out_dir, args.sheet, args.name_col, report_xlsx, vbar,
+                              dump_diff=args.dump_diff,
+                              split_header=header, split_counters=split_counters)
 
     summary = rep.groupby("status")["person"].count().to_dict()
     log(f"校验完成 -> {report_xlsx}")
@@ -417,6 +570,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # pyinstaller 冻结后 Windows spawn 的子进程会重新执行入口脚本，
+    # 不调 freeze_support，--jobs 的进程池会无限递归拉起新进程
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e: